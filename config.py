@@ -1,15 +1,39 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
 
-__all__ = ["CY_END", "DATASETS", "MAP_4", "TIME_FORMATS"]
+__all__ = [
+    "CACHE_DIR",
+    "CACHE_VERSION",
+    "CY_END",
+    "DATASETS",
+    "HTTP_CACHE_EXPIRE",
+    "MAP_4",
+    "MAX_WORKERS",
+    "TIMEOUT",
+    "TIME_FORMATS",
+    "USER_AGENT",
+]
 
 CY_END = int(str(datetime.now().year + 1)[2:])
-TIME_FORMATS = [
-    "%d-%b-%y %H:%M:%S",  # 06-Apr-10 21:11:55
-    "%Y.%m.%d",  # 2010.05.18
-    "%y-%j-%H:%M:%S",  # YY-DOY-HH:MM:SS
-    "%Y.%m.%d_%H:%M:%S",  # 2010.11.10_06:01:20
-    "%d-%b-%Y %H:%M:%S",  # 9-Apr-2010 07:30:00
-]
+# Processed files from previous years are stored here between runs
+CACHE_DIR = Path("cache")
+# Part of the key of every cached file, bump it whenever the processed output changes
+CACHE_VERSION = 3
+# How long a downloaded file is reused before it is revalidated with the server
+HTTP_CACHE_EXPIRE = timedelta(hours=6)
+# Number of files downloaded at the same time
+MAX_WORKERS = 20
+# Seconds to wait for a server before giving up on a request
+TIMEOUT = 30
+USER_AGENT = "SDO-Timeline (+https://github.com/LM-SAL/SDO-Timeline)"
+# Formats of the times in the text files, with a pattern that recognises each one from a single value
+TIME_FORMATS = {
+    "%d-%b-%y %H:%M:%S": r"^\d{1,2}-[A-Za-z]{3}-\d{2} \d{1,2}:\d{2}:\d{2}$",  # 06-Apr-10 21:11:55
+    "%Y.%m.%d": r"^\d{4}\.\d{1,2}\.\d{1,2}$",  # 2010.05.18
+    "%y-%j-%H:%M:%S": r"^\d{2}-\d{1,3}-\d{1,2}:\d{2}:\d{2}$",  # YY-DOY-HH:MM:SS
+    "%Y.%m.%d_%H:%M:%S": r"^\d{4}\.\d{1,2}\.\d{1,2}_\d{1,2}:\d{2}:\d{2}$",  # 2010.11.10_06:01:20
+    "%d-%b-%Y %H:%M:%S": r"^\d{1,2}-[A-Za-z]{3}-\d{4} \d{1,2}:\d{2}:\d{2}$",  # 9-Apr-2010 07:30:00
+}
 MAP_4 = {
     0: "Roll Maneuvers",
     1: "Momentum Management Maneuvers",
@@ -1,20 +1,163 @@
+import hashlib
+import io
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from itertools import product
+from functools import lru_cache
+from itertools import product, repeat
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from loguru import logger
+from pandas.errors import OutOfBoundsDatetime
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util import Retry
+
+from config import (
+    CACHE_DIR,
+    CACHE_VERSION,
+    DATASETS,
+    HTTP_CACHE_EXPIRE,
+    MAP_4,
+    MAX_WORKERS,
+    TIME_FORMATS,
+    TIMEOUT,
+    USER_AGENT,
+)
+
+# A single session so that every request to the same host reuses a pooled connection
+# Responses are cached on disk and revalidated with the server once they expire
+SESSION = CachedSession(
+    str(CACHE_DIR / "aia_cache"),
+    backend="sqlite",
+    expire_after=HTTP_CACHE_EXPIRE,
+    cache_control=True,
+)
+SESSION.headers["User-Agent"] = USER_AGENT
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS, max_retries=Retry(total=3, backoff_factor=0.3))
+SESSION.mount("http://", _ADAPTER)
+SESSION.mount("https://", _ADAPTER)
+# Text that is removed from the dates in a single pass
+# TODO: Improve this
+# "- 21:00" is a very specific date: 2018-10/16 10:00 - 21:00
+_CLEAN_RE = re.compile(r"UT| TBD|ongoing|AIA|HMI|- 21:00")
+# Patterns to recognise each of the TIME_FORMATS from a single value
+_TIME_FORMAT_PROBES = [(re.compile(pattern), time_format) for time_format, pattern in TIME_FORMATS.items()]
+# Turns hours like 05.50 into 05:50
+_HOUR_TRANS = str.maketrans({".": ":"})
+# Columns of the timeline and their types, every file is converted to these so that they combine cleanly
+_TIMELINE_DTYPES = {
+    "Start Time": "datetime64[ns]",
+    "End Time": "datetime64[ns]",
+    "Instrument": "object",
+    "Source": "object",
+    "Comment": "object",
+}
+# Opening tags of the html tables
+_TABLE_TAG_RE = re.compile(rb"<table[\s>]", re.IGNORECASE)
+# Year in the name of the yearly and monthly html files, e.g., jsocobs_info2012.html or cov201201.html
+_URL_YEAR_RE = re.compile(r"(20\d{2})\d*\.html$")
+
+
+def _format_short_date(date: str, year: str, _hack: Optional[datetime] = None) -> pd.Timestamp:
+    """
+    Formats a date which is only a month and day or only a time.
+
+    For example, '11/2' assuming month/day or '18:45'.
+
+    Parameters
+    ----------
+    date : str
+        Date string from the html file.
+    year : str
+        The year of the provided date.
+    _hack : datetime.datetime, optional
+        Date to use for a date which is only a time, by default None.
+
+    Returns
+    -------
+    pandas.Timestamp
+        New date.
+    """
+    # Deal with only times with a hack
+    # Anything without a month/day separator is a time, which can keep a trailing space, e.g., '0:23 '
+    if "/" not in date:
+        return pd.Timestamp(str(_hack.date()) + " " + date)
+    return pd.Timestamp(f"{year}-{date}")
+
 
-from config import DATASETS, MAP_4, TIME_FORMATS
+def _format_date_without_year(date: str, year: str) -> pd.Timestamp:
+    """
+    Formats a date and time which are missing the year.
+
+    For example, '12/10 18:15'.
 
+    Parameters
+    ----------
+    date : str
+        Date string from the html file.
+    year : str
+        The year of the provided date.
 
+    Returns
+    -------
+    pandas.Timestamp
+        New date.
+    """
+    new_date = date.split(" ")
+    return pd.Timestamp(new_date[0] + f"/{year} " + new_date[1])
+
+
+def _format_multiple_dates(date: str, year: str) -> pd.Timestamp:
+    """
+    Formats an entry which has multiple dates and times.
+
+    For example, '8/28 20:35 8/14 20:50'.
+
+    Parameters
+    ----------
+    date : str
+        Date string from the html file.
+    year : str
+        The year of the provided dates.
+
+    Returns
+    -------
+    pandas.Timestamp
+        The first date of the entry.
+    """
+    # TODO: For now, just take the first entry
+    try:
+        # This catches 2010.05.01 - 02
+        return pd.Timestamp(date.split("-")[0])
+    except ValueError:
+        idx = len(date) // (len(date) // 10)
+        return pd.Timestamp(f"{year}-{date[:idx]}")
+
+
+# Lengths of the dates which are only a month and day or only a time
+_SHORT_DATE_LENGTHS = {4, 5}
+# Which formatter to use for a date with a time from its length, anything else is treated as multiple dates
+_DATE_FORMATTERS = {
+    9: _format_date_without_year,
+    10: _format_date_without_year,
+    11: _format_date_without_year,
+    12: _format_date_without_year,
+}
+
+
+@lru_cache(maxsize=4096)
 def _format_date(date: str, year: Optional[str], _hack: Optional[datetime] = None) -> pd.Timestamp:
     """
     Formats the given date.
 
+    The same dates appear in many rows, so the results are cached.
+
     Parameters
     ----------
     date : str
@@ -31,65 +174,121 @@ def _format_date(date: str, year: Optional[str], _hack: Optional[datetime] = Non
     """
     if year is None:
         return pd.Timestamp(date)
-    # Only date e., '11/2' assuming month/day
-    if len(date) in [4, 5]:
-        # Deal with only times with a hack
-        if "/" not in date:
-            new_date = pd.Timestamp(str(_hack.date()) + " " + date)
-        else:
-            new_date = pd.Timestamp(f"{year}-{date}")
-    # Year missing - e.g., '12/10 18:15'
-    elif len(date) in [9, 10, 11, 12]:
-        new_date = date.split(" ")
-        new_date = pd.Timestamp(new_date[0] + f"/{year} " + new_date[1])
-    # Multiple times - e.g., '8/28 20:35 8/14 20:50'
-    # TODO: For now, just take the first entry
-    else:
-        try:
-            # This catches 2010.05.01 - 02
-            new_date = pd.Timestamp(date.split("-")[0])
-        except ValueError:
-            idx = len(date) // (len(date) // 10)
-            new_date = pd.Timestamp(f"{year}-{date[:idx]}")
-    return new_date
+    if len(date) in _SHORT_DATE_LENGTHS:
+        return _format_short_date(date, year, _hack)
+    return _DATE_FORMATTERS.get(len(date), _format_multiple_dates)(date, year)
 
 
-def _clean_date(date: str, *, extra_replace: bool = False) -> str:
+def _format_dates(dates: pd.Series, year: Optional[str], start_dates: Optional[pd.Series] = None) -> pd.Series:
     """
-    Removes any non-numeric characters from the date.
+    Formats a column of cleaned dates.
+
+    The common date formats are parsed for the whole column at once,
+    anything else falls back to `_format_date`.
 
     Parameters
     ----------
-    date : str
-        Date to clean.
+    dates : pd.Series
+        Cleaned date strings from the html file.
+    year : str, optional
+        The year of the provided dates, if it is not present in the date.
+    start_dates : pd.Series, optional
+        Start dates of the same rows, used for dates that are only a time, by default None.
+
+    Returns
+    -------
+    pd.Series
+        New dates.
+    """
+    formatted = pd.Series(pd.NaT, index=dates.index, dtype="datetime64[ns]")
+    if year is not None:
+        lengths = dates.str.len()
+        # Only date e., '11/2' assuming month/day
+        short = lengths.isin(_SHORT_DATE_LENGTHS)
+        only_date = short & dates.str.contains("/", regex=False)
+        formatted[only_date] = pd.to_datetime(year + "-" + dates[only_date], format="%Y-%m/%d", errors="coerce")
+        # Only time e.g., '18:45' which is on the same day as the start date
+        #   The same rule as _format_short_date, anything short without a "/" is a time
+        if start_dates is not None:
+            only_time = short & ~only_date
+            formatted[only_time] = pd.to_datetime(
+                pd.to_datetime(start_dates[only_time], errors="coerce").dt.strftime("%Y-%m-%d")
+                + " "
+                + dates[only_time].str.strip(),
+                format="%Y-%m-%d %H:%M",
+                errors="coerce",
+            )
+        # Year missing - e.g., '12/10 18:15'
+        without_year = lengths.isin(
+            [length for length, formatter in _DATE_FORMATTERS.items() if formatter is _format_date_without_year],
+        )
+        parts = dates[without_year].str.split(" ")
+        formatted[without_year] = pd.to_datetime(
+            parts.str[0] + f"/{year} " + parts.str[1],
+            format="%m/%d/%Y %H:%M",
+            errors="coerce",
+        )
+    # Multiple times and anything that did not match the formats above are parsed one by one
+    unparsed = np.flatnonzero(formatted.isna() & (dates != "NaT"))
+    if not len(unparsed):
+        return formatted
+    # Those dates are not always in the range of datetime64[ns], so the dtype is inferred again
+    values = list(formatted)
+    for idx in unparsed:
+        start_date = None if start_dates is None else start_dates.iloc[idx]
+        values[idx] = _format_date(dates.iloc[idx], year, start_date)
+    return pd.Series(values, index=dates.index)
+
+
+def _clean_dates(dates: pd.Series, *, extra_replace: bool = False) -> pd.Series:
+    """
+    Removes any non-numeric characters from the dates.
+
+    Parameters
+    ----------
+    dates : pd.Series
+        Dates to clean.
     extra_replace : bool, optional
         Whether to replace more characters, by default False.
 
     Returns
     -------
-    str
-        Cleaned date.
-    """
-    date = (
-        " ".join(date.split())
-        .replace("UT", "")
-        .replace(" TBD", "")
-        .replace("ongoing", "")
-        .replace("AIA", "")
-        .replace("HMI", "")
-        # TODO: Improve this
-        # Very specific dates
-        # 2018-10/16 10:00 - 21:00
-        .replace("- 21:00", "")
-    ).split("-")[0]
+    pd.Series
+        Cleaned dates.
+    """
+    dates = dates.str.split().str.join(" ").str.replace(_CLEAN_RE, "", regex=True).str.split("-").str[0]
     if extra_replace:
         # Some hours are 4/4 05.50 so we replace them here
         # However, sometimes the date is 2010.05.01 - 02
-        date = date.replace(".", ":")
-    return date
+        dates = dates.str.translate(_HOUR_TRANS)
+    return dates
+
+
+def _guess_time_format(value: str) -> Optional[str]:
+    """
+    Guesses which of the ``TIME_FORMATS`` a time string is in.
+
+    Parameters
+    ----------
+    value : str
+        Time string to check.
 
+    Returns
+    -------
+    str, None
+        The matching format, None if no format matches.
+    """
+    for pattern, time_format in _TIME_FORMAT_PROBES:
+        if pattern.match(value):
+            return time_format
+    return None
 
-def _process_time(data: pd.DataFrame, column: int = 0) -> pd.DataFrame:
+
+def _process_time(
+    data: pd.DataFrame,
+    column: int = 0,
+    time_format: Optional[str] = None,
+) -> tuple[pd.DataFrame, str]:
     """
     Reformats all the time columns to have a consistent format.
 
@@ -101,17 +300,37 @@ def _process_time(data: pd.DataFrame, column: int = 0) -> pd.DataFrame:
         The dataframe with timestamps.
     column : int, optional
         The column to process, by default 0.
+    time_format : str, optional
+        Format to try before the ones in ``TIME_FORMATS``, by default None.
+        This is normally the format that matched another column of the same file.
+        If None, it is guessed from the first value of the column.
+
+    Returns
+    -------
+    pd.DataFrame
+        The dataframe with the processed column.
+    str
+        The format that matched the column.
     """
-    for time_format in TIME_FORMATS:
+    if time_format is None:
+        # Guessing from the first value avoids parsing the column with every format
+        sample = next((value for value in data.iloc[:, column] if isinstance(value, str)), None)
+        time_format = _guess_time_format(sample) if sample is not None else None
+    formats = list(TIME_FORMATS)
+    if time_format is not None:
+        formats = [time_format, *(fmt for fmt in TIME_FORMATS if fmt != time_format)]
+    for fmt in formats:
+        # Raising stops at the first value that does not match, rather than parsing the whole column
+        # Many values repeat, so caching turns most of the parsing into lookups
         try:
-            data.iloc[:, column] = data.iloc[:, column].apply(
-                lambda x, time_format=time_format: datetime.strptime(x, time_format),
-            )
-            return data
-        except Exception:
-            pass
-    else:
-        raise ValueError(f"Could not find a suitable time format: {data.iloc[0, column]}")
+            parsed = pd.to_datetime(data.iloc[:, column], format=fmt, cache=True)
+        except (ValueError, TypeError):
+            continue
+        # A column with missing values does not match any format
+        if parsed.notna().all():
+            data[data.columns[column]] = parsed
+            return data, fmt
+    raise ValueError(f"Could not find a suitable time format: {data.iloc[0, column]}")
 
 
 def _process_end_time(data: pd.DataFrame, column: int = 1) -> pd.DataFrame:
@@ -120,14 +339,13 @@ def _process_end_time(data: pd.DataFrame, column: int = 1) -> pd.DataFrame:
         pd.to_datetime(data.iloc[:, 0]).dt.strftime("%m/%d/%Y") + " " + data.iloc[:, column],
     )
     # Increment date if end time is before start time
-    timedelta = [
-        pd.Timedelta(days=1) if x < y else pd.Timedelta(days=0) for x, y in zip(data.iloc[:, 0], data.iloc[:, 1])
-    ]
-    data[data.columns[column]] = data[data.columns[column]] + pd.to_timedelta(timedelta)
+    start = data.iloc[:, 0].to_numpy(dtype="datetime64[ns]")
+    end = data.iloc[:, column].to_numpy(dtype="datetime64[ns]")
+    data[data.columns[column]] = end + np.where(end < start, np.timedelta64(1, "D"), np.timedelta64(0, "D"))
     return data
 
 
-def _process_data(data: pd.DataFrame, filepath: str) -> pd.DataFrame:
+def _process_data(data: pd.DataFrame, filepath: str, first_line: str) -> pd.DataFrame:
     """
     Certain online text files have no comments or have a comment in the third
     column.
@@ -138,6 +356,8 @@ def _process_data(data: pd.DataFrame, filepath: str) -> pd.DataFrame:
         Dataframe to process.
     filepath : str
         Path to the file.
+    first_line : str
+        First line of the file, which is used as the comment.
 
     Returns
     -------
@@ -157,10 +377,10 @@ def _process_data(data: pd.DataFrame, filepath: str) -> pd.DataFrame:
     if "Unnamed: 2" in data.columns:
         data.rename(columns={"Unnamed: 2": "Comment"}, inplace=True)
     if data.columns[-1] == "Comment":
-        data["Comment"].fillna(pd.read_fwf(filepath).columns[0])
+        data["Comment"].fillna(first_line)
     else:
         # Assumption that the comment is the first row which pandas turns into a column
-        data["Comment"] = pd.read_fwf(filepath).columns[0]
+        data["Comment"] = first_line
     return data.loc[:, ["Start Time", "End Time", "Instrument", "Comment"]]
 
 
@@ -182,11 +402,9 @@ def _reformat_data(data: pd.DataFrame, filepath: str) -> pd.DataFrame:
         Reformatted dataframe.
     """
     if "_1" in filepath:
-        data["Start Time"] = [None] * len(data)
-        data["End Time"] = [None] * len(data)
-        for i, row in enumerate(data[0].str.split()):
-            data["Start Time"][i] = row[0]
-            data["End Time"][i] = row[1]
+        times = data[0].str.split(n=1, expand=True)
+        data["Start Time"] = times[0]
+        data["End Time"] = times[1]
         data.drop(columns=[0], inplace=True)
         data = data.iloc[:, [1, 2, 0]]
         data.columns = ["Start Time", "End Time", "Comment"]
@@ -197,11 +415,11 @@ def _reformat_data(data: pd.DataFrame, filepath: str) -> pd.DataFrame:
     elif "_4" in filepath:
         data = data.iloc[:, [1, 0]]
         data.columns = ["Start Time", "Comment"]
-        data["Comment"] = data["Comment"].apply(lambda x: MAP_4[x])
+        data["Comment"] = data["Comment"].map(MAP_4)
     return data
 
 
-def process_txt(filepath: str, skip_rows: Optional[list], data: pd.DataFrame) -> pd.DataFrame:
+def process_txt(filepath: str, skip_rows: Optional[list], body: Optional[str] = None) -> Optional[pd.DataFrame]:
     """
     Processes a text file.
 
@@ -211,55 +429,65 @@ def process_txt(filepath: str, skip_rows: Optional[list], data: pd.DataFrame) ->
         File path of the text file.
     skip_rows : list, None
         What rows to skip.
-    data : pd.DataFrame
-        Dataframe to append to.
+    body : str, optional
+        Downloaded contents of the text file, required if it is a URL.
+        If it is None for a URL, the file was not found.
 
     Returns
     -------
-    pd.DataFrame
-        Dataframe with the data from the text file.
+    pd.DataFrame, None
+        Dataframe with the data from the text file, None if there is no data.
     """
     if "http" in filepath:
         logger.debug(f"Processing {filepath}")
+        if body is None:
+            return None
+        # The comment comes from the already downloaded body, skipping any leading blank lines like read_fwf does
+        first_line = body.lstrip().split("\n", 1)[0].strip()
         new_data = pd.read_fwf(
-            filepath,
+            io.StringIO(body),
             header=None if "sdo_spacecraft_night" in filepath else 0,
             skiprows=skip_rows,
         )
-        new_data = _process_time(new_data)
-        new_data[new_data.columns[1]] = new_data.iloc[:, 1].apply(
-            lambda x: pd.Timestamp(str(x).replace(":stol_", "")) if ":stol_" in str(x) else x,
-        )
+        new_data, time_format = _process_time(new_data)
+        # Only the stol entries are full timestamps, so they are parsed on their own
+        end_times = new_data.iloc[:, 1].astype(str)
+        stol = end_times.str.contains(":stol_", regex=False)
+        if stol.any():
+            new_data.loc[stol, new_data.columns[1]] = pd.to_datetime(
+                end_times[stol].str.replace(":stol_", "", regex=False),
+                format="mixed",
+            )
         if "sdo_spacecraft_night" not in filepath:
             new_data = _process_end_time(new_data)
         if len(new_data.columns) in [2, 3]:
-            new_data = _process_data(new_data, filepath)
+            new_data = _process_data(new_data, filepath, first_line)
         elif len(new_data.columns) > 3:
             logger.debug(f"Unexpected number of columns for {filepath}, dropping all but first two")
             new_data = new_data.iloc[:, [0, 1]]
             new_data.columns = ["Start Time", "End Time"]
             try:
-                new_data = _process_time(new_data, 1)
+                new_data, _ = _process_time(new_data, 1, time_format)
             except Exception:
                 pass
-            new_data = _process_data(new_data, filepath)
+            new_data = _process_data(new_data, filepath, first_line)
     else:
         new_data = pd.read_csv(filepath, header=None, sep="    ", skiprows=skip_rows, engine="python")
         new_data = _reformat_data(new_data, filepath)
-        new_data = _process_time(new_data)
-        new_data["Instrument"] = new_data["Comment"].apply(lambda x: "AIA" if "AIA" in x else None)
-        new_data["Instrument"] = new_data["Comment"].apply(lambda x: "HMI" if "HMI" in x else None)
-    new_data["Source"] = filepath.split("/")[-1]
-    data = pd.concat([data, new_data], ignore_index=True)
-    if data.empty:
-        data = new_data
-    else:
-        data = pd.concat([data, new_data], ignore_index=True)
-    new_data["Source"] = filepath.split("/")[-1]
-    return pd.concat([data, new_data], ignore_index=True)
+        new_data, time_format = _process_time(new_data)
+        if "End Time" in new_data.columns:
+            new_data, _ = _process_time(new_data, 1, time_format)
+        comment = new_data["Comment"].astype(str)
+        new_data["Instrument"] = np.select(
+            [comment.str.contains("AIA", regex=False), comment.str.contains("HMI", regex=False)],
+            ["AIA", "HMI"],
+            default="SDO",
+        )
+    new_data["Source"] = filepath.rsplit("/", 1)[-1]
+    return new_data
 
 
-def process_html(url: str, data: pd.DataFrame) -> pd.DataFrame:
+def process_html(url: str, body: Optional[bytes]) -> Optional[pd.DataFrame]:
     """
     Processes an html file.
 
@@ -267,67 +495,76 @@ def process_html(url: str, data: pd.DataFrame) -> pd.DataFrame:
     ----------
     url : str
         URL of the html file.
-    data : pd.DataFrame
-        Dataframe to append to.
+    body : bytes, None
+        Downloaded contents of the html file, None if it was not found.
+        The raw bytes are given so that lxml can work out the encoding itself.
 
     Returns
     -------
-    pd.DataFrame
-        Dataframe with the data from the html file.
-    """
-    request = requests.get(url)
-    if request.status_code == 404:
-        return data
-    soup = BeautifulSoup(request.text, "html.parser")
-    table = soup.find_all("table")
-    # There should be two html tables for this URL
-    if len(table) == 1 and "jsocobs_info" in url:
-        return data
-    table = table[-1]
-    rows = table.find_all("tr")
-    # TODO: Regex to get the year
+    pd.DataFrame, None
+        Dataframe with the data from the html file, None if there is no data.
+    """
+    if body is None:
+        return None
     year = None
+    # Only the jsocobs_info dates are missing the year
     if "jsocobs_info" in url:
-        year = url.split("info")[1].split(".")[0]
+        match = _URL_YEAR_RE.search(url)
+        year = match.group(1) if match else None
     # These HTML tables are by column and not by row
     if "hmi/cov2/" in url:
+        # Only the tables are needed, so the rest of the page is not turned into tags
+        soup = BeautifulSoup(body, "lxml", parse_only=SoupStrainer("table"))
+        rows = soup.find_all("table")[-1].find_all("tr")
         new_rows = rows[0].text.split("\n\n")
         # Time is one single element whereas each event text is a separate element
         dates, text = new_rows[0].strip().split("\n"), new_rows[1:-1]
         instrument = ["HMI" if "HMI" in new_row else "AIA" if "AIA" in new_row else "SDO" for new_row in text]
         comment = [new_row.replace("\n", " ") for new_row in text]
-        start_dates = [(_format_date(_clean_date(date), year)) for date in dates]
+        cleaned_dates = _clean_dates(pd.Series(dates, dtype=object))
+        start_dates = pd.to_datetime(cleaned_dates, errors="coerce")
+        # Only the dates that are not in the same format as the rest are parsed one by one
+        for idx in np.flatnonzero(start_dates.isna()):
+            start_dates[idx] = _format_date(cleaned_dates[idx], year)
         end_dates = [None] * len(dates)
         new_data = pd.DataFrame(
             {"Start Time": start_dates, "End Time": end_dates, "Instrument": instrument, "Comment": comment},
         )
-        new_data["Source"] = url.split("/")[-1]
-        data = pd.concat([data, new_data])
     else:
-        for row in rows[1:]:
-            text = row.text.strip().split("\n")
-            # First column is the start time
-            #   Can have multiple times
-            # Second column is the end time
-            #   Can be be blank
-            # Third column is the event
-            # Fifth column is the AIA Description
-            # Eighth column is the HMI Description
-            comment = text[2].strip() or text[4].strip() or text[7].strip()
-            instrument = "SDO" if text[2].strip() else "AIA" if text[4].strip() else "HMI"
-            extra_replace = False
-            if "jsocobs_info" in url:
-                extra_replace = True
-            start_date = _clean_date(text[0], extra_replace=extra_replace)
-            end_date = _clean_date(text[1], extra_replace=extra_replace) if len(text[1]) > 1 else "NaT"
-            start_date = _format_date(start_date, year)
-            end_date = _format_date(end_date, year, start_date)
-            new_data = pd.Series(
-                {"Start Time": start_date, "End Time": end_date, "Instrument": instrument, "Comment": comment},
-            )
-            new_data["Source"] = url.split("/")[-1]
-            data = pd.concat([data, pd.DataFrame([new_data], columns=new_data.index)]).reset_index(drop=True)
-    return data
+        # First column is the start time
+        #   Can have multiple times
+        # Second column is the end time
+        #   Can be be blank
+        # Third column is the event
+        # Fifth column is the AIA Description
+        # Eighth column is the HMI Description
+        # Every cell of every table is kept as text, otherwise pandas would turn times like 05.50 into numbers
+        # There should be two html tables for this URL
+        #   They are counted in the page, as pd.read_html skips the empty ones
+        if "jsocobs_info" in url and len(_TABLE_TAG_RE.findall(body)) == 1:
+            return None
+        events = pd.read_html(
+            io.BytesIO(body),
+            flavor="lxml",
+            header=0,
+            keep_default_na=False,
+            converters=defaultdict(lambda: str),
+        )[-1]
+        event, aia, hmi = (events.iloc[:, column].str.strip() for column in (2, 4, 7))
+        comments = event.where(event != "", aia.where(aia != "", hmi))
+        instruments = np.select([event != "", aia != ""], ["SDO", "AIA"], default="HMI")
+        extra_replace = "jsocobs_info" in url
+        start_dates = _clean_dates(events.iloc[:, 0], extra_replace=extra_replace)
+        end_dates = events.iloc[:, 1]
+        end_dates = _clean_dates(end_dates, extra_replace=extra_replace).where(end_dates.str.len() > 1, "NaT")
+        start_dates = _format_dates(start_dates, year)
+        end_dates = _format_dates(end_dates, year, start_dates)
+        new_data = pd.DataFrame(
+            {"Start Time": start_dates, "End Time": end_dates, "Instrument": instruments, "Comment": comments},
+            columns=["Start Time", "End Time", "Instrument", "Comment"],
+        )
+    new_data["Source"] = url.rsplit("/", 1)[-1]
+    return new_data
 
 
 def scrape_url(url: str) -> list:
@@ -345,14 +582,205 @@ def scrape_url(url: str) -> list:
         List of all the urls scraped.
     """
     base_url = str(Path(url).parent).replace("https:/", "https://")
-    request = requests.get(url)
-    soup = BeautifulSoup(request.text, "html.parser")
-    urls = []
-    for link in soup.find_all("a"):
-        a_url = link.get("href")
-        if a_url and "txt" in a_url:
-            urls.append(base_url + "/" + a_url)
-    return urls
+    request = SESSION.get(url, timeout=TIMEOUT)
+    soup = BeautifulSoup(request.content, "lxml", parse_only=SoupStrainer("a"))
+    return [base_url + "/" + link["href"] for link in soup.select('a[href*="txt"]')]
+
+
+def _cache_path(url: str, suffix: str) -> Path:
+    """
+    Returns the path of a cache file for the given URL.
+
+    The cache version is part of the key, so files processed by an
+    older version of the scraper are not reused.
+
+    Parameters
+    ----------
+    url : str
+        URL that is cached.
+    suffix : str
+        File extension of the cache file.
+
+    Returns
+    -------
+    pathlib.Path
+        Path of the cache file.
+    """
+    key = hashlib.sha1(f"{CACHE_VERSION}:{url}".encode()).hexdigest()
+    return CACHE_DIR / f"{key}.{suffix}"
+
+
+def _is_historical(url: str) -> bool:
+    """
+    Checks if the URL is for a year that is over and so will not change.
+
+    Parameters
+    ----------
+    url : str
+        URL to check.
+
+    Returns
+    -------
+    bool
+        True if the URL is for a previous year.
+    """
+    match = _URL_YEAR_RE.search(url)
+    return match is not None and int(match.group(1)) < datetime.now().year
+
+
+def _read_cache(url: str) -> Optional[pd.DataFrame]:
+    """
+    Loads the processed data of a URL from the cache.
+
+    Parameters
+    ----------
+    url : str
+        URL to load.
+
+    Returns
+    -------
+    pd.DataFrame, None
+        Cached dataframe, None if the URL has not been cached.
+    """
+    path = _cache_path(url, "parquet")
+    if not path.exists():
+        return None
+    return pd.read_parquet(path)
+
+
+def _write_cache(url: str, data: pd.DataFrame) -> None:
+    """
+    Saves the processed data of a URL to the cache.
+
+    Parameters
+    ----------
+    url : str
+        URL that was processed.
+    data : pd.DataFrame
+        Processed dataframe.
+    """
+    CACHE_DIR.mkdir(exist_ok=True)
+    try:
+        data.to_parquet(_cache_path(url, "parquet"), index=False)
+    except Exception as e:
+        logger.debug(f"Could not cache {url}: {e}")
+
+
+def _as_timeline(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the processed data of a file to the columns and types of the timeline.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Processed dataframe.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with the same columns as every other file.
+        The times are datetime64[ns] unless they hold text or dates out of its range.
+    """
+    data = data.reindex(columns=list(_TIMELINE_DTYPES))
+    text = data["End Time"].map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    if text.any():
+        # End times that a file left as text are tried with the same formats as the text files
+        try:
+            parsed, _ = _process_time(data.loc[text, ["End Time"]])
+            data.loc[text, "End Time"] = parsed["End Time"]
+        except ValueError:
+            logger.debug("Keeping end times that match none of the time formats as text")
+    for column, dtype in _TIMELINE_DTYPES.items():
+        # Text is never guessed as a date, otherwise a time like 21:30 would be given today's date
+        if dtype == "object" or data[column].map(lambda value: isinstance(value, str)).any():
+            continue
+        try:
+            data[column] = data[column].astype(dtype)
+        except OutOfBoundsDatetime:
+            # Some html dates are parsed to the year 1, which datetime64[ns] cannot hold
+            # Parquet gives those back as datetime64[us], which pd.concat would try to cast to ns
+            logger.debug(f"Keeping {column} as objects, as it has dates out of the nanosecond range")
+            data[column] = data[column].astype(object)
+    return data
+
+
+def process_one(url: str, block: dict) -> Optional[pd.DataFrame]:
+    """
+    Downloads and processes a single file of a dataset.
+
+    Parameters
+    ----------
+    url : str
+        URL or file path of the file.
+    block : dict
+        Configuration of the dataset the file belongs to.
+
+    Returns
+    -------
+    pd.DataFrame, None
+        Dataframe with the data from the file, None if there is no data.
+    """
+    response = None
+    if "http" in url:
+        cached = _read_cache(url)
+        # Previous years never change, so there is no need to download them again
+        if cached is not None and _is_historical(url):
+            logger.info(f"Loading {url} from the cache")
+            return _as_timeline(cached)
+        # Streamed so that the body is only downloaded once we know the file exists
+        response = SESSION.get(url, timeout=TIMEOUT, stream=True)
+        # The body has not changed since it was last processed
+        if cached is not None and response.from_cache:
+            logger.info(f"Loading {url} from the cache")
+            return _as_timeline(cached)
+        # Many of the generated yearly and monthly URLs do not exist, their error page is never read
+        if response.status_code == 404:
+            response.close()
+        else:
+            response.raise_for_status()
+    logger.info(f"Parsing {url}")
+    found = response is not None and response.status_code != 404
+    if "txt" in url:
+        # The text files have no charset, which requests would decode as ISO-8859-1 rather than UTF-8
+        body = response.content.decode("utf-8") if found else None
+        new_data = process_txt(url, block.get("SKIP_ROWS"), body)
+    elif "html" in url:
+        new_data = process_html(url, response.content if found else None)
+    else:
+        raise ValueError(f"Unknown file type for {url}")
+    if new_data is None:
+        return None
+    new_data = _as_timeline(new_data)
+    if response is not None:
+        _write_cache(url, new_data)
+    return new_data
+
+
+def _is_later_end_time(end_time, current_end_time) -> bool:
+    """
+    Checks if an end time should replace the end time of a merged event.
+
+    Parameters
+    ----------
+    end_time : pandas.Timestamp, str, None
+        End time of the event that is merged.
+    current_end_time : pandas.Timestamp, str, None
+        End time of the event it is merged into.
+
+    Returns
+    -------
+    bool
+        True if the end time is known and later than the current one, or the current one is missing.
+    """
+    if pd.isna(end_time):
+        return False
+    if pd.isna(current_end_time):
+        return True
+    try:
+        return end_time > current_end_time
+    except TypeError:
+        # End times that were kept as text cannot be compared with timestamps
+        return False
 
 
 def drop_duplicates(data: pd.DataFrame) -> pd.DataFrame:
@@ -367,50 +795,47 @@ def drop_duplicates(data: pd.DataFrame) -> pd.DataFrame:
     Returns
     -------
     pd.DataFrame
-        Deduplicated dataframe.
-    """
-    first_row = {
-        "Start Time": data["Start Time"][0],
-        "End Time": data["End Time"][0],
-        "Instrument": data["Instrument"][0],
-        "Source": data["Source"][0],
-        "Comment": data["Comment"][0],
-    }
-    updated_timeline = pd.DataFrame([first_row])
-    for idx, row in data.iterrows():
-        if idx == 0:
-            continue
-        # We want to combine events that <=5 minutes apart
-        if row["Start Time"] - updated_timeline.iloc[-1]["Start Time"] <= pd.Timedelta("5 minute"):
-            updated_timeline.loc[updated_timeline["Start Time"] == row["Start Time"], "End Time"] = row["End Time"]
+        Deduplicated dataframe, with the instrument and source as categories.
+    """
+    columns = ["Start Time", "End Time", "Instrument", "Source", "Comment"]
+    start_time, end_time, instrument, source, comment = data[columns].iloc[0]
+    start_times, end_times, instruments, sources, comments = [start_time], [end_time], [instrument], [source], [comment]
+    # We want to combine events that <=5 minutes apart
+    # In seconds and added rather than subtracted, so that dates out of the nanosecond range do not overflow
+    window = pd.Timedelta(minutes=5).as_unit("s")
+    for start_time, end_time, instrument, source, comment in data[columns].iloc[1:].itertuples(index=False, name=None):
+        if start_time <= start_times[-1] + window:
+            # Only a later end time replaces the known one, a missing or earlier one is ignored
+            if _is_later_end_time(end_time, end_times[-1]):
+                end_times[-1] = end_time
             # Need to update the instrument and comment if they are different
-            if updated_timeline.iloc[-1]["Instrument"] != row["Instrument"]:
-                updated_timeline.loc[updated_timeline["Start Time"] == row["Start Time"], "Instrument"] = "SDO"
-            if row["Comment"] not in updated_timeline.iloc[-1]["Comment"]:
-                updated_timeline.loc[updated_timeline["Start Time"] == row["Start Time"], "Comment"] = (
-                    updated_timeline.iloc[-1]["Comment"] + " and " + row["Comment"]
-                )
-            if row["Source"] not in updated_timeline.iloc[-1]["Source"]:
-                updated_timeline.loc[updated_timeline["Start Time"] == row["Start Time"], "Source"] = (
-                    updated_timeline.iloc[-1]["Source"] + " and " + row["Source"]
-                )
+            if instruments[-1] != instrument:
+                instruments[-1] = "SDO"
+            if comment not in comments[-1]:
+                comments[-1] = comments[-1] + " and " + comment
+            if source not in sources[-1]:
+                sources[-1] = sources[-1] + " and " + source
             continue
-        insert_row = {
-            "Start Time": row["Start Time"],
-            "End Time": row["End Time"],
-            "Instrument": row["Instrument"],
-            "Source": row["Source"],
-            "Comment": row["Comment"],
-        }
-        updated_timeline = pd.concat([updated_timeline, pd.DataFrame([insert_row])])
-    return updated_timeline
+        start_times.append(start_time)
+        end_times.append(end_time)
+        instruments.append(instrument)
+        sources.append(source)
+        comments.append(comment)
+    return pd.DataFrame(
+        {
+            "Start Time": start_times,
+            "End Time": end_times,
+            "Instrument": pd.Categorical(instruments),
+            "Source": pd.Categorical(sources),
+            "Comment": comments,
+        },
+    )
 
 
 if __name__ == "__main__":
-    final_timeline = pd.DataFrame(columns=["Start Time", "End Time", "Instrument", "Source", "Comment"])
+    frames = []
+    dataset_urls = {}
     for dataset_name, block in DATASETS.items():
-        logger.info(f"Scraping {dataset_name}")
-        logger.info(f"{len(final_timeline.index)} rows so far")
         urls = [block.get("URL")]
         if block.get("SCRAPE"):
             urls = scrape_url(block["URL"])
@@ -421,22 +846,28 @@ if __name__ == "__main__":
                 ]
             else:
                 urls = [block["fURL"].format(f"20{i:02}") for i in block["RANGE"]]
-        for url in sorted(urls):
-            logger.info(f"Parsing {url}")
-            if "txt" in url:
-                final_timeline = process_txt(url, block.get("SKIP_ROWS"), final_timeline)
-            elif "html" in url:
-                final_timeline = process_html(url, final_timeline)
-            else:
-                raise ValueError(f"Unknown file type for {url}")
+        dataset_urls[dataset_name] = sorted(urls)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Every file is submitted up front so that downloads overlap with the parsing of other files
+        results = {
+            dataset_name: executor.map(process_one, urls, repeat(DATASETS[dataset_name]))
+            for dataset_name, urls in dataset_urls.items()
+        }
+        for dataset_name, dataset_results in results.items():
+            logger.info(f"Scraping {dataset_name}")
+            logger.info(f"{sum(len(frame.index) for frame in frames)} rows so far")
+            frames.extend(new_data for new_data in dataset_results if new_data is not None)
 
+    final_timeline = pd.concat(frames, ignore_index=True)
     logger.info(f"{len(final_timeline.index)} rows in total")
+    final_timeline = final_timeline.fillna({"Instrument": "SDO", "Comment": "No Comment"})
+    # Only a handful of distinct values, filled first as a category cannot take new values
+    final_timeline = final_timeline.astype({"Instrument": "category", "Source": "category"})
     final_timeline = final_timeline.sort_values("Start Time")
     final_timeline = final_timeline.reset_index(drop=True)
-    final_timeline["End Time"] = final_timeline["End Time"].fillna("Unknown")
-    final_timeline["Instrument"] = final_timeline["Instrument"].fillna("SDO")
-    final_timeline["Comment"] = final_timeline["Comment"].fillna("No Comment")
     final_timeline = drop_duplicates(final_timeline)
+    # Filled last so that the end times stay as datetimes until the timeline is written
+    final_timeline = final_timeline.fillna({"End Time": "Unknown"})
     logger.info(f"{len(final_timeline.index)} rows in after deduplication")
     today_date = pd.Timestamp("today").strftime("%Y%m%d")
     final_timeline.to_csv(f"timeline_{today_date}.csv", index=False)